@@ -1,337 +1,733 @@
-import csv
-from collections import deque
-from decimal import Decimal
-
-
-print("===== 商品组合优化查找程序 =====")
-
-
-def load_products_from_csv(file_path):
-    """从CSV文件加载商品信息."""
-    products = []
-    with open(file_path, 'r', encoding='utf-8') as csv_file:
-        reader = csv.reader(csv_file)
-        next(reader)  # 跳过标题行
-        for row in reader:
-            if len(row) >= 2:
-                name = row[0]
-                try:
-                    price = Decimal(row[1])
-                    products.append({"name": name, "price": price})
-                except (ValueError, IndexError):
-                    print(f"无法处理行: {row}")
-    return products
-
-
-def set_price_range() -> tuple[Decimal, Decimal]:
-    """设置价格范围."""
-    while True:
-        try:
-            min_price = Decimal(input("最小总价 (默认495): ") or "495")
-            max_price = Decimal(input("最大总价 (默认500): ") or "500")
-            if min_price <= max_price:
-                return min_price, max_price
-            else:
-                print("错误: 最小价格必须小于或等于最大价格")
-        except Exception:
-            print("请输入有效的数字")
-
-
-def calculate_max_quantity(product_price, max_total):
-    """计算商品最大可购买数量."""
-    if product_price == Decimal('0'):
-        return 100  # 防止除以零
-    return int(max_total // product_price)
-
-
-class SolutionFinder:
-    """查找满足条件的商品组合解决方案."""
-    
-    def __init__(self, min_total=Decimal('495'), max_total=Decimal('500')):
-        self.min_total = min_total
-        self.max_total = max_total
-        self.constraints = {}  # 商品约束字典
-        self.found_solutions = set()  # 已找到的解决方案集合
-    
-    def set_constraint(self, product_index: int, min_qty: int, max_qty: int):
-        """设置单个商品的约束条件。
-        
-        Args:
-            product_index (int): 商品索引
-            min_qty (int): 最小数量
-            max_qty (int): 最大数量
-        """
-        self.constraints[product_index] = {
-            "min": min_qty,
-            "max": max_qty
-        }
-    
-    def set_constraints_from_dict(self, constraints_dict: dict):
-        """从字典批量设置约束条件."""
-        self.constraints = constraints_dict.copy()
-    
-    def initialize_search(self):
-        """初始化搜索状态."""
-        self.stack = deque()
-        initial_quantities = [0] * len(products)
-        for idx, constraint in self.constraints.items():
-            initial_quantities[idx] = constraint["min"]
-        
-        initial_cost = sum(
-            initial_quantities[i] * products[i]["price"]
-            for i in range(len(products))
-        )
-        self.stack.append((0, initial_quantities, initial_cost))
-    
-    def find_next_solution(self):
-        """寻找下一个满足条件的解决方案."""
-        while self.stack:
-            idx, quantities, current_cost = self.stack.pop()
-            
-            if idx == len(products):
-                if self.min_total <= current_cost <= self.max_total:
-                    valid = True
-                    for prod_idx, constraint in self.constraints.items():
-                        if not (constraint["min"] <= quantities[prod_idx] <= constraint["max"]):
-                            valid = False
-                            break
-                    if valid:
-                        solution_key = tuple(quantities)
-                        if solution_key not in self.found_solutions:
-                            self.found_solutions.add(solution_key)
-                            return True, quantities, current_cost
-                continue
-            
-            if idx in self.constraints:
-                min_val = self.constraints[idx]["min"]
-                max_val = self.constraints[idx]["max"]
-                for qty in range(max_val, min_val - 1, -1):
-                    new_quantities = quantities.copy()
-                    new_quantities[idx] = qty
-                    new_cost = current_cost + (qty - quantities[idx]) * products[idx]["price"]
-                    if new_cost <= self.max_total:
-                        self.stack.append((idx + 1, new_quantities, new_cost))
-            else:
-                price = products[idx]["price"]
-                max_possible = (self.max_total - current_cost) // price
-                max_qty = int(max_possible)
-                for qty in range(max_qty, -1, -1):
-                    new_quantities = quantities.copy()
-                    new_quantities[idx] = qty
-                    new_cost = current_cost + qty * price
-                    if new_cost <= self.max_total:
-                        self.stack.append((idx + 1, new_quantities, new_cost))
-        return False, None, None
-
-
-def setup_constraints(max_total: Decimal) -> dict:
-    """交互式设置商品约束条件，基于最大总价计算默认最大采购数量."""
-    constraints = {}
-    print("\n===== 设置商品采购约束 =====")
-    print("每个商品的约束格式: min,max (如: 0,5 表示数量在0-5之间)")
-    print("直接回车则使用自动计算的约束，商品数量将在0到系统计算的最大可能之间")
-    print(", 前留空视作min为0，, 后留空视作max为自动计算的最大可能")
-    print("----------------------------")
-    
-    for i, product in enumerate(products):
-        # 计算此商品在最大价格下可购买的最大数量
-        max_possible = calculate_max_quantity(product["price"], max_total)
-        
-        print(f"{i + 1}. {product['name']} - 单价: {product['price']} 元/箱")
-        print(f"   最大可能数量: {max_possible} 箱")
-        
-        while True:
-            constraint_input = input(f"   设置约束 (min,max): ").strip()
-            if not constraint_input:
-                # 默认设置: 最小0，最大为计算出的最大可能数量
-                constraints[i] = {"min": 0, "max": max_possible}
-                print(f"   已设置: 最少 0 箱, 最多 {max_possible} 箱")
-                break
-            else:
-                try:
-                    parts = constraint_input.split(',')
-                    min_val = int(parts[0]) if parts[0] else 0
-                    max_val = int(parts[1]) if len(parts) > 1 and parts[1] else max_possible
-                    
-                    # 确保min和max不超过最大可选数量
-                    if min_val > max_possible:
-                        print(f"   警告: 最小值 {min_val} 超过了最大可能数量 {max_possible}，已自动调整为 {max_possible}")
-                        min_val = max_possible
-                    
-                    if max_val > max_possible:
-                        print(f"   警告: 最大值 {max_val} 超过了最大可能数量 {max_possible}，已自动调整为 {max_possible}")
-                        max_val = max_possible
-                    
-                    # 确保min不大于max
-                    if min_val > max_val:
-                        print(f"   警告: 最小值 {min_val} 大于最大值 {max_val}，已自动调整最小值为 {max_val}")
-                        min_val = max_val
-                    
-                    constraints[i] = {"min": min_val, "max": max_val}
-                    print(f"   已设置: 最少 {min_val} 箱, 最多 {max_val} 箱")
-                    break
-                except Exception:
-                    print("   输入格式错误，请重试")
-    return constraints
-
-
-def setup_default_constraints(max_total: Decimal) -> dict:
-    """设置默认约束（基于原始需求），并计算最大可能数量."""
-    product_to_idx = {p["name"]: i for i, p in enumerate(products)}
-    constraints = {}
-    
-    # 先设置基本的最小值约束
-    default_min_values = {
-        "农夫山泉 东方树叶 茉莉花茶500ml*15瓶": 4,
-        "维他 250ml*24盒 柠檬茶": 1,
-        "椰树 椰汁味 245ml*24盒 椰子汁": 1,
-        "农夫山泉 380ml/瓶 24瓶/箱 饮用天然水": 0,
-        "农夫山泉 550ml*24瓶/箱 矿泉水": 0,
-    }
-    
-    # 特殊约束 - 设置为0的产品保持最大值也为0
-    zero_max_products = ["农夫山泉 380ml/瓶 24瓶/箱 饮用天然水", "农夫山泉 550ml*24瓶/箱 矿泉水"]
-    
-    for product_name, idx in product_to_idx.items():
-        # 计算最大值
-        if product_name in zero_max_products:
-            max_val = 0
-        else:
-            max_val = calculate_max_quantity(products[idx]["price"], max_total)
-        
-        # 获取默认最小值
-        min_val = default_min_values.get(product_name, 0)
-        
-        # 确保min不超过max
-        if min_val > max_val:
-            print(f"警告: 商品 '{product_name}' 的最小值 {min_val} 超过了最大可能数量 {max_val}，已自动调整为 {max_val}")
-            min_val = max_val
-        
-        constraints[idx] = {"min": min_val, "max": max_val}
-    
-    return constraints
-
-
-def write_solutions_to_csv(solutions, filename='product_solutions.csv', format_type='wide'):
-    """将解决方案写入CSV文件.
-    
-    Args:
-        solutions: 解决方案列表，每个元素为 (quantities, total_cost)
-        filename: 文件名
-        format_type: 格式类型（'wide'或'long'）
-    """
-    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.writer(csvfile)
-        
-        if format_type == 'wide':
-            header = ['方案编号', '总成本']
-            header.extend(p["name"] for p in products)
-            writer.writerow(header)
-            
-            for i, (quantities, total_cost) in enumerate(solutions, 1):
-                row = [i, total_cost] + quantities
-                writer.writerow(row)
-        else:
-            writer.writerow(['方案编号', '商品名称', '数量', '单价', '小计'])
-            
-            for i, (quantities, total_cost) in enumerate(solutions, 1):
-                for j, qty in enumerate(quantities):
-                    if qty > 0:
-                        product = products[j]
-                        item_cost = qty * product["price"]
-                        writer.writerow([i, product["name"], qty, product["price"], item_cost])
-                writer.writerow([i, '总计', '', '', total_cost])
-                writer.writerow(['', '', '', '', ''])
-
-
-def main():
-    """主程序入口."""
-    global products
-    
-    # 加载商品数据
-    products_file = input("商品列表文件（默认为products.csv）：") or "products.csv"
-    products = load_products_from_csv(products_file)
-    print(f"===== 已找到{len(products)}个商品 =====")
-    
-    # 首先设置总价范围
-    min_total, max_total = set_price_range()
-    
-    # 选择约束设置方式
-    print("\n请选择约束设置方式:")
-    print("1. 使用默认约束（按原始需求）")
-    print("2. 手动设置每个商品的约束")
-    choice = input("请选择 (1/2): ").strip()
-    
-    if choice == "2":
-        constraints = setup_constraints(max_total)
-    else:
-        constraints = setup_default_constraints(max_total)
-    
-    # 是否逐个输出
-    print("\n是否逐个输出？")
-    while True:
-        choice = input("请选择 (y/n): ").strip()
-        if choice in ["y", "Y", ""]:
-            one_by_one = True
-            break
-        elif choice in ["n", "N"]:
-            one_by_one = False
-            break
-    
-    # 初始化查找器
-    finder = SolutionFinder(min_total, max_total)
-    finder.set_constraints_from_dict(constraints)
-    finder.initialize_search()
-    
-    solution_count = 0
-    all_solutions = []
-    
-    print("\n开始查找符合条件的商品组合...")
-    while True:
-        success, quantities, total_cost = finder.find_next_solution()
-        if not success:
-            if solution_count == 0:
-                print("未找到满足条件的解决方案。")
-            else:
-                print(f"\n已找到所有满足条件的解决方案，共 {solution_count} 个。")
-            break
-        
-        solution_count += 1
-        print(f"\n第 {solution_count} 个优解:")
-        all_solutions.append((quantities, total_cost))
-        
-        for i, qty in enumerate(quantities):
-            if qty > 0:
-                product = products[i]
-                item_cost = qty * product["price"]
-                print(f"- {product['name']}: {qty} 箱 x {product['price']} = {item_cost} 元")
-        print(f"总成本: {total_cost} 元")
-        
-        if not one_by_one:
-            continue
-        
-        choice = input("\n是否继续查找更多解决方案？(y/n): ").strip()
-        if choice.lower() != 'y':
-            break
-    
-    # 导出结果
-    if solution_count > 0:
-        filename = input("\n请输入CSV文件名 (默认: product_solutions.csv): ") or "product_solutions.csv"
-        print("\n请选择CSV格式:")
-        print("1. 宽格式 - 每行一个解决方案")
-        print("2. 长格式 - 每个商品占一行")
-        while True:
-            choice = input("请选择 (1/2): ").strip()
-            if choice in ["1", ""]:
-                format_type = 'wide'
-                break
-            elif choice == "2":
-                format_type = 'long'
-                break
-        
-        write_solutions_to_csv(all_solutions, filename, format_type)
-        print(f"解决方案已导出到 {filename}")
-
-
-if __name__ == "__main__":
-    main()
+import csv
+import io
+import multiprocessing
+from collections import namedtuple
+from decimal import Decimal, ROUND_CEILING, ROUND_FLOOR
+
+# numpy/numba 仅用于加速搜索内核, 缺失时自动退回纯 Python 实现
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+# 运行时特化搜索(见 _codegen_search)展开的最大商品数, 代码体积随 N 线性增长
+_CODEGEN_MAX_PRODUCTS = 20
+
+# 整盒向量化枚举(见 _box_search)允许的最大可行盒体积, 约束内存占用
+_BOX_ENUM_LIMIT = 1_000_000
+
+# 负缓存(见 _dfs)不记录最后几层: 叶子附近的子树重算比缓存更便宜,
+# 而这些状态在数量上占绝对多数; 同时给缓存一个硬上限防止内存失控
+_MEMO_TAIL_LEVELS = 4
+_MEMO_MAX_STATES = 1_000_000
+
+
+print("===== 商品组合优化查找程序 =====")
+
+
+# 商品记录: 比字典省内存, 且热循环里的字段访问是固定偏移读取
+Product = namedtuple("Product", ["name", "price", "price_cents"])
+
+
+def set_products(new_products):
+    """设置全局商品表, 并同步派生的价格数组(SoA).
+
+    搜索热路径只读 product_price_cents 这一个连续数组, 不逐条
+    商品记录取字段; 展示代码仍用 products 里的 Product 记录.
+    """
+    global products, product_price_cents
+    products = new_products
+    product_price_cents = [p.price_cents for p in new_products]
+
+
+def _parse_price_cents(text):
+    """把 "XX.YY" 形式的两位小数价格直接解析为整数分.
+
+    目录里的价格几乎都是这种定点写法, 两次整数转换比完整的 Decimal
+    构造便宜得多; 其他写法(整数、一位小数、科学计数等)返回 None,
+    由调用方退回 Decimal 解析.
+    """
+    whole, sep, frac = text.partition('.')
+    if sep and len(frac) == 2 and whole.isdigit() and frac.isdigit():
+        try:
+            return int(whole) * 100 + int(frac)
+        except ValueError:
+            return None
+    return None
+
+
+def load_products_from_csv(file_path):
+    """从CSV文件加载商品信息."""
+    products = []
+    with open(file_path, 'r', encoding='utf-8', newline='',
+              buffering=1 << 20) as csv_file:
+        reader = csv.reader(csv_file)
+        next(reader)  # 跳过标题行
+        for row in reader:
+            if len(row) >= 2:
+                name = row[0]
+                try:
+                    # 搜索热循环全部用整数"分"运算, Decimal 只留给展示
+                    price_cents = _parse_price_cents(row[1])
+                    if price_cents is not None:
+                        price = Decimal(price_cents).scaleb(-2)
+                    else:
+                        price = Decimal(row[1])
+                        price_cents = int((price * 100).to_integral_value())
+                    products.append(Product(name, price, price_cents))
+                except (ValueError, IndexError):
+                    print(f"无法处理行: {row}")
+    return products
+
+
+def set_price_range() -> tuple[Decimal, Decimal]:
+    """设置价格范围."""
+    while True:
+        try:
+            min_price = Decimal(input("最小总价 (默认495): ") or "495")
+            max_price = Decimal(input("最大总价 (默认500): ") or "500")
+            if min_price <= max_price:
+                return min_price, max_price
+            else:
+                print("错误: 最小价格必须小于或等于最大价格")
+        except Exception:
+            print("请输入有效的数字")
+
+
+def calculate_max_quantity(product_price, max_total):
+    """计算商品最大可购买数量."""
+    if product_price == Decimal('0'):
+        return 100  # 防止除以零
+    return int(max_total // product_price)
+
+
+def _dfs_kernel(prices, min_q, max_q, max_remaining, base_cost,
+                min_cents, max_cents):
+    """迭代式回溯搜索内核, 全部为 int64 运算, 可被 Numba 编译为机器码.
+
+    cur[d] 是深度 d 当前尝试的数量, costs[d] 是进入深度 d 前的前缀成本
+    (base_cost 已含全部商品的最小数量花费, 包括不在搜索轴上的固定项).
+    返回 (解数, n+1) 矩阵, 每行为数量向量加总成本. 枚举顺序与纯 Python
+    路径一致: 每层数量从上限递减.
+    """
+    n = prices.shape[0]
+
+    out = np.empty((64, n + 1), dtype=np.int64)
+    n_out = 0
+
+    cur = np.empty(n, dtype=np.int64)
+    costs = np.empty(n + 1, dtype=np.int64)
+    costs[0] = base_cost
+    depth = 0
+    cap = max_q[0]
+    if prices[0] > 0:
+        bound = min_q[0] + (max_cents - base_cost) // prices[0]
+        if bound < cap:
+            cap = bound
+    cur[0] = cap
+
+    while True:
+        qty = cur[depth]
+        if qty < min_q[depth]:
+            # 本层取值枚举完, 回溯
+            depth -= 1
+            if depth < 0:
+                break
+            cur[depth] -= 1
+            continue
+        new_cost = costs[depth] + (qty - min_q[depth]) * prices[depth]
+        if new_cost + max_remaining[depth + 1] < min_cents:
+            # qty 递减时成本单调下降, 本层剩余取值全部剪掉
+            depth -= 1
+            if depth < 0:
+                break
+            cur[depth] -= 1
+            continue
+        if depth == n - 1:
+            # new_cost <= max_cents 由每层的起始上界保证
+            if new_cost >= min_cents:
+                if n_out == out.shape[0]:
+                    grown = np.empty((out.shape[0] * 2, n + 1), dtype=np.int64)
+                    grown[:n_out] = out[:n_out]
+                    out = grown
+                out[n_out, :n] = cur
+                out[n_out, n] = new_cost
+                n_out += 1
+            cur[depth] -= 1
+        else:
+            costs[depth + 1] = new_cost
+            depth += 1
+            cap = max_q[depth]
+            if prices[depth] > 0:
+                bound = min_q[depth] + (max_cents - new_cost) // prices[depth]
+                if bound < cap:
+                    cap = bound
+            cur[depth] = cap
+    return out[:n_out]
+
+
+if np is not None and njit is not None:
+    _dfs_kernel = njit(cache=True, boundscheck=False)(_dfs_kernel)
+
+
+def _solve_subtree(args):
+    """工作进程: 把指定商品数量钉死为 qty 后穷举子树(供 Pool 调用).
+
+    商品表随任务一起序列化传入: spawn/forkserver 启动的子进程不会继承
+    父进程的模块全局, 不能指望 set_products 的结果还在.
+    """
+    task_products, min_total, max_total, constraints, pin_idx, qty = args
+    set_products(task_products)
+    sub_constraints = dict(constraints)
+    sub_constraints[pin_idx] = {"min": qty, "max": qty}
+    finder = SolutionFinder(min_total, max_total)
+    finder.set_constraints_from_dict(sub_constraints)
+    finder.initialize_search()
+
+    results = []
+    while True:
+        success, quantities, total_cost = finder.find_next_solution()
+        if not success:
+            break
+        results.append((quantities, total_cost))
+    return results
+
+
+class SolutionFinder:
+    """查找满足条件的商品组合解决方案."""
+    
+    def __init__(self, min_total=Decimal('495'), max_total=Decimal('500')):
+        self.min_total = min_total
+        self.max_total = max_total
+        # 整数"分"边界: 最小值向上取整、最大值向下取整, 区间语义不变
+        self.min_cents = int((min_total * 100).to_integral_value(rounding=ROUND_CEILING))
+        self.max_cents = int((max_total * 100).to_integral_value(rounding=ROUND_FLOOR))
+        self.constraints = {}  # 商品约束字典
+        self.solution_count = 0  # 已产出的解决方案个数
+    
+    def set_constraint(self, product_index: int, min_qty: int, max_qty: int):
+        """设置单个商品的约束条件。
+        
+        Args:
+            product_index (int): 商品索引
+            min_qty (int): 最小数量
+            max_qty (int): 最大数量
+        """
+        self.constraints[product_index] = {
+            "min": min_qty,
+            "max": max_qty
+        }
+    
+    def set_constraints_from_dict(self, constraints_dict: dict):
+        """从字典批量设置约束条件."""
+        self.constraints = constraints_dict.copy()
+    
+    def initialize_search(self):
+        """初始化搜索状态."""
+        # 把热循环里要反复读取的单价和约束摊平成按商品索引的数组;
+        # 未约束商品的上限即预算上限, 于是搜索中不再区分两类商品
+        n = len(products)
+        self.prices = product_price_cents
+        self.min_q = [0] * n
+        self.max_q = [0] * n
+        infeasible = False
+        for i in range(n):
+            price = self.prices[i]
+            constraint = self.constraints.get(i)
+            if constraint is not None:
+                self.min_q[i] = constraint["min"]
+                self.max_q[i] = constraint["max"]
+                if self.max_q[i] < self.min_q[i]:
+                    # 矛盾约束(min > max): 该商品没有可行取值, 整体无解
+                    infeasible = True
+            else:
+                self.max_q[i] = self.max_cents // price if price else 100
+
+        self.quantities = list(self.min_q)
+        initial_cost = sum(
+            self.quantities[i] * self.prices[i] for i in range(n)
+        )
+
+        # 按单价从高到低排列搜索轴: 大价格商品先分支, 预算上界在浅层就能
+        # 剪掉整棵子树. quantities 始终保持原始商品顺序, 仅遍历顺序改变.
+        # 上下限相等的商品(如钉死为 0 的)数量已定且计入 initial_cost,
+        # 不占搜索层级, 输出时从 quantities 里的固定值直接带出.
+        self.order = [
+            i for i in sorted(range(n), key=lambda i: -self.prices[i])
+            if self.max_q[i] > self.min_q[i]
+        ]
+
+        # 后缀最大追加花费(分): 从搜索位置 pos 开始把剩余商品都买到上限还能
+        # 再花多少钱. current_cost 已包含各商品的最小数量, 因此这里累计的是
+        # (max-min) 的余量, current_cost + max_remaining[pos] 即可达的最大总价.
+        m = len(self.order)
+        self.max_remaining = [0] * (m + 1)
+        for pos in range(m - 1, -1, -1):
+            i = self.order[pos]
+            span = self.max_q[i] - self.min_q[i]
+            self.max_remaining[pos] = (
+                self.max_remaining[pos + 1] + span * self.prices[i]
+            )
+
+        self.solution_count = 0
+
+        box_size = 1
+        for i in range(n):
+            box_size *= self.max_q[i] - self.min_q[i] + 1
+            if box_size > _BOX_ENUM_LIMIT:
+                break
+
+        if infeasible or initial_cost > self.max_cents:
+            # 存在矛盾约束, 或各商品最小数量已超出预算, 无解
+            self._search = iter(())
+        elif np is not None and njit is not None and m > 0:
+            self._search = self._kernel_search(initial_cost)
+        elif np is not None and 0 < n and box_size <= _BOX_ENUM_LIMIT:
+            self._search = self._box_search()
+        elif 0 < m <= _CODEGEN_MAX_PRODUCTS:
+            self._search = self._codegen_search(initial_cost)
+        else:
+            self._no_solution = set()  # 确定无解的 (idx, cost) 状态负缓存
+            self._memo_depth_limit = m - _MEMO_TAIL_LEVELS
+            self._search = self._dfs(0, initial_cost)
+
+    def _kernel_search(self, initial_cost):
+        """用编译后的内核一次性跑完搜索, 再逐个产出结果."""
+        order = self.order
+        m = len(order)
+        prices = np.array([self.prices[i] for i in order], dtype=np.int64)
+        min_q = np.array([self.min_q[i] for i in order], dtype=np.int64)
+        max_q = np.array([self.max_q[i] for i in order], dtype=np.int64)
+        max_remaining = np.array(self.max_remaining, dtype=np.int64)
+
+        rows = _dfs_kernel(prices, min_q, max_q, max_remaining,
+                           initial_cost, self.min_cents, self.max_cents)
+        for row in rows:
+            # 不在搜索轴上的商品数量固定为 min_q, 直接回填
+            quantities = list(self.min_q)
+            for pos in range(m):
+                quantities[order[pos]] = int(row[pos])
+            yield quantities, int(row[m])
+
+    def _box_search(self):
+        """小可行盒: 一次 NumPy 广播枚举整个约束盒, 矩阵乘算价后布尔过滤.
+
+        仅在没有 Numba 且盒体积不超过 _BOX_ENUM_LIMIT 时使用; 所有
+        工作都在向量化的 C 循环里完成, 没有逐节点的解释器开销.
+        """
+        n = len(products)
+        min_q = np.array(self.min_q, dtype=np.int64)
+        max_q = np.array(self.max_q, dtype=np.int64)
+        prices = np.array(self.prices, dtype=np.int64)
+
+        grids = np.indices(tuple(max_q - min_q + 1)).reshape(n, -1).T + min_q
+        costs = grids @ prices
+        mask = (costs >= self.min_cents) & (costs <= self.max_cents)
+        for row, cost in zip(grids[mask], costs[mask]):
+            yield [int(qty) for qty in row], int(cost)
+
+    def _codegen_search(self, initial_cost):
+        """运行时特化: 按当前的商品数、单价和约束生成完全展开的搜索代码.
+
+        每个搜索位置展开成一层带常量边界的 for 循环, 单价、约束和后缀
+        剪枝界全部作为字面量烘焙进字节码, 消除了逐层的数组下标、属性
+        访问和递归调用开销. 语义与 _dfs 完全一致.
+        """
+        n = len(products)
+        m = len(self.order)
+        inverse = [None] * n
+        for pos, prod in enumerate(self.order):
+            inverse[prod] = pos
+
+        lines = ["def _specialized():", f"    c0 = {initial_cost}"]
+        for pos in range(m):
+            prod = self.order[pos]
+            price = self.prices[prod]
+            lo = self.min_q[prod]
+            hi = self.max_q[prod]
+            pad = "    " * (pos + 1)
+            if price:
+                lines.append(
+                    f"{pad}cap{pos} = min({hi}, {lo} + "
+                    f"({self.max_cents} - c{pos}) // {price})"
+                )
+            else:
+                lines.append(f"{pad}cap{pos} = {hi}")
+            lines.append(f"{pad}for q{pos} in range(cap{pos}, {lo - 1}, -1):")
+            body = "    " * (pos + 2)
+            lines.append(f"{body}c{pos + 1} = c{pos} + (q{pos} - {lo}) * {price}")
+            lines.append(
+                f"{body}if c{pos + 1} + {self.max_remaining[pos + 1]} "
+                f"< {self.min_cents}: break"
+            )
+        leaf = "    " * (m + 1)
+        # 不在搜索轴上的商品数量固定, 直接烘焙成字面量
+        quantity_list = ", ".join(
+            f"q{inverse[i]}" if inverse[i] is not None else str(self.min_q[i])
+            for i in range(n)
+        )
+        lines.append(f"{leaf}yield [{quantity_list}], c{m}")
+
+        namespace = {}
+        exec(compile("\n".join(lines), "<specialized-dfs>", "exec"), namespace)
+        yield from namespace["_specialized"]()
+
+    def _dfs(self, idx, current_cost):
+        """回溯式深度优先枚举所有满足条件的数量组合.
+
+        整棵搜索树共享同一个 self.quantities 列表：进入分支前写入
+        数量，所有子分支走完后复原，避免为每个节点复制整个列表。
+        只有在叶子处产出解时才物化一份拷贝。
+
+        返回值表示该子树是否产出过解; 子树的输出只由 (idx, current_cost)
+        决定, 与到达路径无关, 因此无解的状态记入 _no_solution 负缓存,
+        之后经由不同前缀到达同一状态时整棵子树直接剪掉.
+
+        循环里要反复读取的属性在帧入口一次性绑定为局部变量, 把逐次
+        迭代的 LOAD_ATTR 换成 LOAD_FAST.
+        """
+        order = self.order
+        quantities = self.quantities
+        min_cents = self.min_cents
+
+        if idx == len(order):
+            # 仅当搜索轴为空(商品表为空或全部商品被钉死)时会走到这里
+            if min_cents <= current_cost <= self.max_cents:
+                yield list(quantities), current_cost
+                return True
+            return False
+
+        no_solution = self._no_solution
+        memoizable = idx <= self._memo_depth_limit
+        if memoizable and (idx, current_cost) in no_solution:
+            return False
+
+        prod = order[idx]
+        price = self.prices[prod]
+        base_qty = quantities[prod]
+        min_val = self.min_q[prod]
+        max_val = self.max_q[prod]
+        if price:
+            # 进入本层时做一次整除得到预算上限, 循环内不再逐个判断
+            # new_cost <= max_cents (零单价时成本不变, 由父层保证在预算内)
+            budget_cap = base_qty + (self.max_cents - current_cost) // price
+            if budget_cap < max_val:
+                max_val = budget_cap
+
+        max_rem_next = self.max_remaining[idx + 1]
+        last = idx + 1 == len(order)
+        dfs = self._dfs
+        found = False
+        for qty in range(max_val, min_val - 1, -1):
+            new_cost = current_cost + (qty - base_qty) * price
+            if new_cost + max_rem_next < min_cents:
+                # qty 递减时 new_cost 单调下降, 连剩余全买满都到不了 min_cents,
+                # 更小的 qty 也不可能, 整段剪掉.
+                break
+            quantities[prod] = qty
+            if last:
+                # 末层时 max_rem_next == 0, 能走到这里即已落在区间内;
+                # 每层枚举只产生约束范围内的取值, 无需再回查约束;
+                # 各层取值互不相同, 同一数量向量只会被枚举到一次.
+                found = True
+                yield list(quantities), new_cost
+            else:
+                if (yield from dfs(idx + 1, new_cost)):
+                    found = True
+        quantities[prod] = base_qty
+        if (not found and memoizable
+                and len(no_solution) < _MEMO_MAX_STATES):
+            no_solution.add((idx, current_cost))
+        return found
+
+    def solutions(self):
+        """以生成器形式逐个产出 (quantities, total_cost).
+
+        一次 initialize_search 后可直接 for 循环消费, 中途 break 再继续
+        迭代也能接着上次的位置查找.
+        """
+        for quantities, cost_cents in self._search:
+            self.solution_count += 1
+            yield quantities, Decimal(cost_cents).scaleb(-2)
+
+    def find_next_solution(self):
+        """寻找下一个满足条件的解决方案."""
+        result = next(self._search, None)
+        if result is None:
+            return False, None, None
+        quantities, cost_cents = result
+        self.solution_count += 1
+        return True, quantities, Decimal(cost_cents).scaleb(-2)
+
+    def find_all_solutions(self, processes=None):
+        """穷举全部解. 按第一个搜索位置的数量切分成互不相交的子树,
+        用进程池并行求解; 顶层分支只有一个取值时退回串行搜索.
+
+        Returns:
+            解决方案列表，每个元素为 (quantities, total_cost)
+        """
+        self.initialize_search()
+
+        first = self.order[0] if self.order else None
+        if first is not None:
+            lo = self.min_q[first]
+            hi = self.max_q[first]
+        else:
+            lo = hi = 0
+
+        if processes is None:
+            processes = multiprocessing.cpu_count()
+
+        if first is None or hi <= lo or processes <= 1:
+            # 顶层只有一个分支(或显式要求串行), 并行没有收益
+            return list(self.solutions())
+
+        # 与串行 DFS 一致: 第一个搜索位置的数量从大到小.
+        # 商品表一并打包, 子进程不依赖父进程的模块全局.
+        tasks = [
+            (products, self.min_total, self.max_total,
+             self.constraints, first, qty)
+            for qty in range(hi, lo - 1, -1)
+        ]
+        # 子树按第一个位置的数量切分, 互不相交, 合并无需去重
+        solutions = []
+        with multiprocessing.Pool(min(processes, len(tasks))) as pool:
+            for sub_solutions in pool.imap(_solve_subtree, tasks):
+                solutions.extend(sub_solutions)
+        self.solution_count = len(solutions)
+        return solutions
+
+
+def setup_constraints(max_total: Decimal) -> dict:
+    """交互式设置商品约束条件，基于最大总价计算默认最大采购数量."""
+    constraints = {}
+    print("\n===== 设置商品采购约束 =====")
+    print("每个商品的约束格式: min,max (如: 0,5 表示数量在0-5之间)")
+    print("直接回车则使用自动计算的约束，商品数量将在0到系统计算的最大可能之间")
+    print(", 前留空视作min为0，, 后留空视作max为自动计算的最大可能")
+    print("----------------------------")
+    
+    for i, product in enumerate(products):
+        # 计算此商品在最大价格下可购买的最大数量
+        max_possible = calculate_max_quantity(product.price, max_total)
+        
+        print(f"{i + 1}. {product.name} - 单价: {product.price} 元/箱")
+        print(f"   最大可能数量: {max_possible} 箱")
+        
+        while True:
+            constraint_input = input(f"   设置约束 (min,max): ").strip()
+            if not constraint_input:
+                # 默认设置: 最小0，最大为计算出的最大可能数量
+                constraints[i] = {"min": 0, "max": max_possible}
+                print(f"   已设置: 最少 0 箱, 最多 {max_possible} 箱")
+                break
+            else:
+                try:
+                    parts = constraint_input.split(',')
+                    min_val = int(parts[0]) if parts[0] else 0
+                    max_val = int(parts[1]) if len(parts) > 1 and parts[1] else max_possible
+                    
+                    # 确保min和max不超过最大可选数量
+                    if min_val > max_possible:
+                        print(f"   警告: 最小值 {min_val} 超过了最大可能数量 {max_possible}，已自动调整为 {max_possible}")
+                        min_val = max_possible
+                    
+                    if max_val > max_possible:
+                        print(f"   警告: 最大值 {max_val} 超过了最大可能数量 {max_possible}，已自动调整为 {max_possible}")
+                        max_val = max_possible
+                    
+                    # 确保min不大于max
+                    if min_val > max_val:
+                        print(f"   警告: 最小值 {min_val} 大于最大值 {max_val}，已自动调整最小值为 {max_val}")
+                        min_val = max_val
+                    
+                    constraints[i] = {"min": min_val, "max": max_val}
+                    print(f"   已设置: 最少 {min_val} 箱, 最多 {max_val} 箱")
+                    break
+                except Exception:
+                    print("   输入格式错误，请重试")
+    return constraints
+
+
+def setup_default_constraints(max_total: Decimal) -> dict:
+    """设置默认约束（基于原始需求），并计算最大可能数量."""
+    product_to_idx = {p.name: i for i, p in enumerate(products)}
+    constraints = {}
+    
+    # 先设置基本的最小值约束
+    default_min_values = {
+        "农夫山泉 东方树叶 茉莉花茶500ml*15瓶": 4,
+        "维他 250ml*24盒 柠檬茶": 1,
+        "椰树 椰汁味 245ml*24盒 椰子汁": 1,
+        "农夫山泉 380ml/瓶 24瓶/箱 饮用天然水": 0,
+        "农夫山泉 550ml*24瓶/箱 矿泉水": 0,
+    }
+    
+    # 特殊约束 - 设置为0的产品保持最大值也为0
+    zero_max_products = ["农夫山泉 380ml/瓶 24瓶/箱 饮用天然水", "农夫山泉 550ml*24瓶/箱 矿泉水"]
+    
+    for product_name, idx in product_to_idx.items():
+        # 计算最大值
+        if product_name in zero_max_products:
+            max_val = 0
+        else:
+            max_val = calculate_max_quantity(products[idx].price, max_total)
+        
+        # 获取默认最小值
+        min_val = default_min_values.get(product_name, 0)
+        
+        # 确保min不超过max
+        if min_val > max_val:
+            print(f"警告: 商品 '{product_name}' 的最小值 {min_val} 超过了最大可能数量 {max_val}，已自动调整为 {max_val}")
+            min_val = max_val
+        
+        constraints[idx] = {"min": min_val, "max": max_val}
+    
+    return constraints
+
+
+def write_solutions_to_csv(solutions, filename='product_solutions.csv', format_type='wide'):
+    """将解决方案写入CSV文件.
+    
+    Args:
+        solutions: 解决方案列表，每个元素为 (quantities, total_cost)
+        filename: 文件名
+        format_type: 格式类型（'wide'或'long'）
+    """
+    with open(filename, 'w', newline='', encoding='utf-8',
+              buffering=1 << 20) as csvfile:
+        # 先在内存里把整份 CSV 格式化好, 最后一次性写入文件,
+        # 把逐行 write 的调用和系统调用开销压成一次
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        if format_type == 'wide':
+            header = ['方案编号', '总成本']
+            header.extend(p.name for p in products)
+            writer.writerow(header)
+
+            # 一次 writerows 写完全部方案行, 免去逐行的 Python 调用
+            writer.writerows(
+                [i, total_cost, *quantities]
+                for i, (quantities, total_cost) in enumerate(solutions, 1)
+            )
+        else:
+            writer.writerow(['方案编号', '商品名称', '数量', '单价', '小计'])
+
+            # 每个方案攒成一批, 一次 writerows 落盘, 减少逐行调用开销
+            for i, (quantities, total_cost) in enumerate(solutions, 1):
+                batch = []
+                for j, qty in enumerate(quantities):
+                    if qty > 0:
+                        product = products[j]
+                        item_cost = qty * product.price
+                        batch.append([i, product.name, qty, product.price, item_cost])
+                batch.append([i, '总计', '', '', total_cost])
+                batch.append(['', '', '', '', ''])
+                writer.writerows(batch)
+
+        csvfile.write(buffer.getvalue())
+
+
+def main():
+    """主程序入口."""
+    # 加载商品数据
+    products_file = input("商品列表文件（默认为products.csv）：") or "products.csv"
+    set_products(load_products_from_csv(products_file))
+    print(f"===== 已找到{len(products)}个商品 =====")
+    
+    # 首先设置总价范围
+    min_total, max_total = set_price_range()
+    
+    # 选择约束设置方式
+    print("\n请选择约束设置方式:")
+    print("1. 使用默认约束（按原始需求）")
+    print("2. 手动设置每个商品的约束")
+    choice = input("请选择 (1/2): ").strip()
+    
+    if choice == "2":
+        constraints = setup_constraints(max_total)
+    else:
+        constraints = setup_default_constraints(max_total)
+    
+    # 是否逐个输出
+    print("\n是否逐个输出？")
+    while True:
+        choice = input("请选择 (y/n): ").strip()
+        if choice in ["y", "Y", ""]:
+            one_by_one = True
+            break
+        elif choice in ["n", "N"]:
+            one_by_one = False
+            break
+    
+    # 初始化查找器
+    finder = SolutionFinder(min_total, max_total)
+    finder.set_constraints_from_dict(constraints)
+
+    def print_solution(index, quantities, total_cost):
+        print(f"\n第 {index} 个优解:")
+        for i, qty in enumerate(quantities):
+            if qty > 0:
+                product = products[i]
+                item_cost = qty * product.price
+                print(f"- {product.name}: {qty} 箱 x {product.price} = {item_cost} 元")
+        print(f"总成本: {total_cost} 元")
+
+    solution_count = 0
+    all_solutions = []
+
+    print("\n开始查找符合条件的商品组合...")
+    if not one_by_one:
+        # 批量模式: 按首个搜索位置切分, 多进程并行穷举
+        all_solutions = finder.find_all_solutions()
+        for quantities, total_cost in all_solutions:
+            solution_count += 1
+            print_solution(solution_count, quantities, total_cost)
+        if solution_count == 0:
+            print("未找到满足条件的解决方案。")
+        else:
+            print(f"\n已找到所有满足条件的解决方案，共 {solution_count} 个。")
+    else:
+        finder.initialize_search()
+        for quantities, total_cost in finder.solutions():
+            solution_count += 1
+            all_solutions.append((quantities, total_cost))
+            print_solution(solution_count, quantities, total_cost)
+
+            choice = input("\n是否继续查找更多解决方案？(y/n): ").strip()
+            if choice.lower() != 'y':
+                break
+        else:
+            if solution_count == 0:
+                print("未找到满足条件的解决方案。")
+            else:
+                print(f"\n已找到所有满足条件的解决方案，共 {solution_count} 个。")
+    
+    # 导出结果
+    if solution_count > 0:
+        filename = input("\n请输入CSV文件名 (默认: product_solutions.csv): ") or "product_solutions.csv"
+        print("\n请选择CSV格式:")
+        print("1. 宽格式 - 每行一个解决方案")
+        print("2. 长格式 - 每个商品占一行")
+        while True:
+            choice = input("请选择 (1/2): ").strip()
+            if choice in ["1", ""]:
+                format_type = 'wide'
+                break
+            elif choice == "2":
+                format_type = 'long'
+                break
+        
+        write_solutions_to_csv(all_solutions, filename, format_type)
+        print(f"解决方案已导出到 {filename}")
+
+
+if __name__ == "__main__":
+    main()